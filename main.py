@@ -17,21 +17,84 @@
 
 import requests
 import configparser
+import orjson
 import os
+import queue
+import sqlite3
 import sys
+import threading
 import time
 from datetime import datetime
 from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse, parse_qs, urlencode
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 class PullRequestAnalyzer:
+    # Batches 50 pull requests plus their first 100 changed file paths into a
+    # single request instead of one REST call per PR
+    GRAPHQL_PR_QUERY = '''
+        query($owner: String!, $repo: String!, $states: [PullRequestState!], $cursor: String) {
+            repository(owner: $owner, name: $repo) {
+                pullRequests(first: 50, after: $cursor, states: $states,
+                             orderBy: {field: CREATED_AT, direction: DESC}) {
+                    pageInfo { endCursor hasNextPage }
+                    nodes {
+                        number
+                        url
+                        createdAt
+                        updatedAt
+                        files(first: 100) {
+                            nodes { path }
+                            pageInfo { hasNextPage }
+                        }
+                    }
+                }
+            }
+        }'''
+
     def __init__(self):
         self.RESULTS_PER_PAGE = 100
+        # The workload is almost entirely waiting on the network, so the worker
+        # count is set well above the CPU-based ThreadPoolExecutor default.
+        # Keep it below GitHub's ~100 concurrent-request secondary rate limit.
+        self.MAX_WORKERS = int(os.environ.get('PRFS_WORKERS', 32))
+        # Match the connection pool to the worker count so threads never wait
+        # to check out a socket
+        self.POOL_SIZE = self.MAX_WORKERS
+        self.reset_search_results()
+        self._config_loaded = False
+        self._print_lock = threading.Lock()
+
+        # Rate-limit budget reported by GitHub on every response; assume a
+        # full primary budget until the first response arrives
+        self._rate_limit_lock = threading.Lock()
+        self._rate_limit_remaining = 5000
+        self._rate_limit_reset = 0
+
+        # Share one session across all requests so keep-alive connections are
+        # reused instead of opening a new TLS connection per API call
+        self.session = requests.Session()
+        adapter = HTTPAdapter(
+            pool_connections=self.POOL_SIZE,
+            pool_maxsize=self.POOL_SIZE,
+            max_retries=Retry(total=3, backoff_factor=0.5, status_forcelist=[502, 503, 504])
+        )
+        self.session.mount('https://', adapter)
+
+    def reset_search_results(self):
+        '''Clears per-search state so the analyzer can be reused for another search'''
         self.pull_requests_with_file = []
         self.pull_requests_searched = 0
         self.files_searched = 0
 
     def read_config(self):
-        '''Reads and validates the configuration file config.ini'''
+        '''Reads and validates the configuration file config.ini. Loaded only
+        once per process; repeat searches reuse the parsed configuration along
+        with the warm connection pool and response cache.'''
+        if self._config_loaded:
+            return
+
         if getattr(sys, 'frozen', False):
             application_path = os.path.dirname(sys.executable)
         else:
@@ -41,6 +104,8 @@ class PullRequestAnalyzer:
         if not os.path.exists(config_path):
             raise FileNotFoundError(f'Configuration file "config.ini" not found in {application_path}')
 
+        self._init_cache(application_path)
+
         config = configparser.ConfigParser()
         config.read(config_path)
 
@@ -64,12 +129,23 @@ class PullRequestAnalyzer:
 
         self.HEADERS = {
             'Accept': 'application/vnd.github+json',
-            'Authorization': f'Bearer {self.GITHUB_TOKEN}'
+            'Authorization': f'Bearer {self.GITHUB_TOKEN}',
+            'X-GitHub-Api-Version': '2022-11-28'
             }
+        self.session.headers.update(self.HEADERS)
+        self._config_loaded = True
 
     def get_user_inputs(self):
         '''Prompts the user for inputs and validates them.'''
-        self.target_file = input('Enter full path of file to search for in pull requests: ')
+        while True:
+            target_input = input('Enter full path of file(s) to search for in pull requests (comma-separated): ')
+            # Membership tests against a frozenset stay O(1) per file no matter
+            # how many targets are given
+            self.target_files = frozenset(filter(None, map(str.strip, target_input.split(','))))
+            if self.target_files:
+                break
+            print('Enter at least one file path.')
+        self.targets_display = ', '.join(sorted(self.target_files))
 
         while True:
             pr_status = input('\nWould you like to search just open pull requests or all pull requests? (open/all): ').strip().lower()
@@ -111,107 +187,366 @@ class PullRequestAnalyzer:
                 print('\nProcessing all PRs with no date filtering...')
         else: print('\nProcessing all open PRs...')
 
-    def fetch_pull_requests(self):
-        '''Generator function to fetch all pull requests with pagination'''
-        page = 1
-        while True:
-            pulls_url = f'{self.GITHUB_ENDPOINT}/repos/{self.OWNER}/{self.REPO}/pulls'
-            params = {
-                'state': self.pr_status, 
-                'per_page': self.RESULTS_PER_PAGE, 
-                'page': page,
-                'sort': 'created',
-                'direction': 'desc'
-            }
+    def _throttle_rate_limit(self):
+        '''Sleeps until the rate-limit window resets once the remaining budget
+        is too low to keep every worker fed, instead of letting requests 403
+        and aborting the whole search'''
+        with self._rate_limit_lock:
+            remaining = self._rate_limit_remaining
+            reset = self._rate_limit_reset
+        if remaining < self.MAX_WORKERS * 2:
+            delay = reset - time.time()
+            if delay > 0:
+                print(f'Approaching the GitHub rate limit; pausing {delay:.0f} seconds until it resets...')
+                time.sleep(delay)
 
-            # Make API request and check for errors
-            response = requests.get(pulls_url, headers=self.HEADERS, params=params, verify=True)
-            if response.status_code != 200:
-                raise Exception(f'Error fetching pull requests: {response.status_code}, {response.text}')
-            
-            pulls = response.json()
-            if not pulls:
-                break  # No more pull requests
-            yield from pulls
-
-            if 'next' in response.links:
-                page += 1
-            else:
+    def _update_rate_limit(self, response):
+        '''Records the rate-limit budget GitHub reports on every response'''
+        if 'X-RateLimit-Remaining' in response.headers:
+            with self._rate_limit_lock:
+                self._rate_limit_remaining = int(response.headers['X-RateLimit-Remaining'])
+                self._rate_limit_reset = int(response.headers.get('X-RateLimit-Reset', 0))
+
+    def _request(self, method, url, **kwargs):
+        '''Issues an API request, throttling against the primary rate limit and
+        backing off per Retry-After when a secondary rate limit trips'''
+        response = None
+        for attempt in range(3):
+            self._throttle_rate_limit()
+            response = self.session.request(method, url, **kwargs)
+            self._update_rate_limit(response)
+            rate_limited = (
+                response.status_code in (403, 429)
+                and ('Retry-After' in response.headers
+                     or response.headers.get('X-RateLimit-Remaining') == '0')
+            )
+            if not rate_limited:
                 break
+            delay = (int(response.headers.get('Retry-After', 0))
+                     or max(self._rate_limit_reset - time.time(), 0)
+                     or 2 ** attempt)
+            print(f'Rate limited by GitHub; retrying in {delay:.0f} seconds...')
+            time.sleep(delay)
+        return response
 
-    def fetch_pr_files(self, pull_number):
-        '''Generator function to fetch files in pull request with pagination'''
-        page = 1
+    def _init_cache(self, application_path):
+        '''Opens the on-disk response cache used for ETag conditional requests'''
+        cache_path = os.path.join(application_path, 'gh_cache.sqlite')
+        self._cache_lock = threading.Lock()
+        self._cache = sqlite3.connect(cache_path, check_same_thread=False)
+        self._cache.execute(
+            'CREATE TABLE IF NOT EXISTS responses '
+            '(url_key TEXT PRIMARY KEY, etag TEXT, body TEXT, links TEXT)'
+        )
+        self._cache.execute(
+            'CREATE TABLE IF NOT EXISTS pr_files '
+            '(owner TEXT, repo TEXT, number INTEGER, updated_at TEXT, files TEXT, '
+            'PRIMARY KEY (owner, repo, number))'
+        )
+        self._cache.commit()
+
+    def _fetch_json(self, url, params, error_context):
+        '''Performs a GET request and returns the parsed JSON body and pagination links.
+
+        Sends If-None-Match with the cached ETag when a previous response is cached;
+        a 304 reply is served from the cache and does not count against the rate limit.'''
+        url_key = f'{url}?{urlencode(sorted(params.items()))}'
+        with self._cache_lock:
+            cached = self._cache.execute(
+                'SELECT etag, body, links FROM responses WHERE url_key = ?', (url_key,)
+            ).fetchone()
+
+        headers = {'If-None-Match': cached[0]} if cached else None
+        response = self._request('GET', url, params=params, headers=headers, verify=True)
+        if response.status_code == 304:
+            return orjson.loads(cached[1]), orjson.loads(cached[2])
+        if response.status_code != 200:
+            raise Exception(f'Error {error_context}: {response.status_code}, {response.text}')
+
+        etag = response.headers.get('ETag')
+        if etag:
+            with self._cache_lock:
+                self._cache.execute(
+                    'INSERT OR REPLACE INTO responses VALUES (?, ?, ?, ?)',
+                    (url_key, etag, response.text, orjson.dumps(response.links).decode())
+                )
+                self._cache.commit()
+        return orjson.loads(response.content), response.links
+
+    def _parse_last_page(self, links):
+        '''Extracts the total page count from the Link "last" header, if present'''
+        if 'last' not in links:
+            return 1
+        return int(parse_qs(urlparse(links['last']['url']).query)['page'][0])
+
+    def _fetch_remaining_pages(self, url, params, last_page, error_context):
+        '''Generator function to fetch pages 2 through last_page concurrently,
+        yielding their items in page order'''
+        with ThreadPoolExecutor(max_workers=self.MAX_WORKERS, thread_name_prefix='pr-pages') as executor:
+            futures = [
+                executor.submit(self._fetch_json, url, {**params, 'page': page}, error_context)
+                for page in range(2, last_page + 1)
+            ]
+            try:
+                for future in futures:
+                    items, _ = future.result()
+                    yield from items
+            finally:
+                # Cancel pages still queued if the consumer stops early
+                for future in futures:
+                    future.cancel()
+
+    def _post_graphql(self, variables):
+        '''Executes the batched pull-request query against the GraphQL API'''
+        response = self._request(
+            'POST',
+            f'{self.GITHUB_ENDPOINT}/graphql',
+            json={'query': self.GRAPHQL_PR_QUERY, 'variables': variables}
+        )
+        if response.status_code != 200:
+            raise Exception(f'Error querying GraphQL API: {response.status_code}, {response.text}')
+        payload = orjson.loads(response.content)
+        if 'errors' in payload:
+            raise Exception(f'GraphQL query failed: {payload["errors"]}')
+        return payload['data']['repository']['pullRequests']
+
+    def fetch_pull_requests_graphql(self):
+        '''Generator function to fetch pull requests in batches of 50 via GraphQL,
+        each bundled with its first 100 changed file paths'''
+        states = ['OPEN'] if self.pr_status == 'open' else None
+        cursor = None
         while True:
-            files_url = f'{self.GITHUB_ENDPOINT}/repos/{self.OWNER}/{self.REPO}/pulls/{pull_number}/files'
-            params = {'per_page': self.RESULTS_PER_PAGE, 'page': page}
-
-            # Make API request and check for errors
-            response = requests.get(files_url, headers=self.HEADERS, params=params, verify=True)
-            if response.status_code != 200:
-                raise Exception(f'Error fetching files for PR #{pull_number}: {response.status_code}, {response.text}')    
-                
-            files = response.json()
-            if not files:
-                break  # No more files in this pull request
-            yield from files
-
-            if 'next' in response.links:
-                page += 1
-            else:
+            result = self._post_graphql(
+                {'owner': self.OWNER, 'repo': self.REPO, 'states': states, 'cursor': cursor}
+            )
+            yield from result['nodes']
+            if not result['pageInfo']['hasNextPage']:
                 break
+            cursor = result['pageInfo']['endCursor']
+
+    def _slim_pr(self, pr):
+        '''Projects a pulls-list entry down to the fields the scan reads, so the
+        bulk of each ~20KB entry (body, head/base, _links, user objects) is
+        released as soon as the page is parsed'''
+        return {
+            'number': pr['number'],
+            'html_url': pr['html_url'],
+            'created_at': pr['created_at'],
+            'updated_at': pr['updated_at']
+        }
+
+    def fetch_pull_requests(self):
+        '''Generator function to fetch all pull requests, prefetching pages in parallel'''
+        pulls_url = f'{self.GITHUB_ENDPOINT}/repos/{self.OWNER}/{self.REPO}/pulls'
+        params = {
+            'state': self.pr_status,
+            'per_page': self.RESULTS_PER_PAGE,
+            'page': 1,
+            'sort': 'created',
+            'direction': 'desc'
+        }
+
+        pulls, links = self._fetch_json(pulls_url, params, 'fetching pull requests')
+        yield from map(self._slim_pr, pulls)
+
+        # A short first page means there is nothing left to paginate
+        if len(pulls) < self.RESULTS_PER_PAGE:
+            return
+
+        last_page = self._parse_last_page(links)
+        if last_page > 1:
+            yield from map(
+                self._slim_pr,
+                self._fetch_remaining_pages(pulls_url, params, last_page, 'fetching pull requests')
+            )
+
+    def fetch_pr_files(self, pull_number):
+        '''Generator function to fetch changed file paths in pull request,
+        prefetching pages in parallel. Yields only the filename of each entry;
+        the rest (notably the full patch text) is dropped at the page boundary.'''
+        files_url = f'{self.GITHUB_ENDPOINT}/repos/{self.OWNER}/{self.REPO}/pulls/{pull_number}/files'
+        params = {'per_page': self.RESULTS_PER_PAGE, 'page': 1}
+        error_context = f'fetching files for PR #{pull_number}'
+
+        files, links = self._fetch_json(files_url, params, error_context)
+        yield from (file['filename'] for file in files)
+
+        # Most PRs change only a handful of files; a short first page means
+        # there is nothing left to paginate
+        if len(files) < self.RESULTS_PER_PAGE:
+            return
+
+        last_page = self._parse_last_page(links)
+        if last_page > 1:
+            yield from (
+                file['filename']
+                for file in self._fetch_remaining_pages(files_url, params, last_page, error_context)
+            )
+
+    def _parse_created_at(self, created_at):
+        '''Parses GitHub's ISO-8601 timestamps (e.g. 2024-01-31T12:00:00Z) with
+        the C-implemented fromisoformat parser, which is an order of magnitude
+        faster than strptime when called once per pull request'''
+        return datetime.fromisoformat(created_at.rstrip('Z'))
+
+    def _filter_by_date_range(self, prs, created_key):
+        '''Generator that passes through pull requests inside the configured
+        date range, stopping at the first one older than START_DATE (the
+        listings are sorted by creation date descending). The date_filtering
+        check is hoisted out of the per-PR loop.'''
+        if not self.date_filtering:
+            yield from prs
+            return
+        for pr in prs:
+            pr_created_at = self._parse_created_at(pr[created_key])
+            if pr_created_at > self.END_DATE:
+                continue
+            if pr_created_at < self.START_DATE:
+                print('Reached pull requests outside the date range. Stopping.')
+                return
+            yield pr
 
     def process_pull_requests(self):
-        '''Processes pull requests and checks for the target file asynchronously'''
+        '''Processes pull requests and checks for the target file'''
         self.start_time = time.time()
-        file_request_futures=[]
-        with ThreadPoolExecutor() as executor:
-            for pr in self.fetch_pull_requests():
-                # Only process PRs that fall within specified date range
-                if self.date_filtering:
-                    pr_created_at = datetime.strptime(pr['created_at'], '%Y-%m-%dT%H:%M:%SZ')
-                    if pr_created_at > self.END_DATE:
-                        continue
-                    elif pr_created_at < self.START_DATE:
-                        # Since pull requests are sorted by creation date descending,
-                        # we can stop processing further pull requests
-                        print('Reached pull requests outside the date range. Stopping.')
-                        break
+        try:
+            self.process_pull_requests_graphql()
+        except Exception as e:
+            if self.pull_requests_searched:
+                raise  # Partial progress; a REST rescan would double-count
+            print(f'GraphQL search unavailable ({e}); falling back to REST scan.')
+            self.process_pull_requests_rest()
 
+    def process_pull_requests_graphql(self):
+        '''Processes pull requests fetched in batches via GraphQL. PRs with more
+        than 100 changed files fall back to REST file pagination.'''
+        file_request_futures = []
+        with ThreadPoolExecutor(max_workers=self.MAX_WORKERS, thread_name_prefix='pr-files') as executor:
+            for pr in self._filter_by_date_range(self.fetch_pull_requests_graphql(), 'createdAt'):
                 pull_number = pr['number']
-                pull_url = pr['html_url']
+                pull_url = pr['url']
                 self.pull_requests_searched += 1
                 print(f'Processing PR #{pull_number}')
-                file_request_futures.append(executor.submit(self.read_files, pull_number, pull_url))
-            
-            # Display error message for any pull requests we were unable to fetch files for 
-            # and continue processing
-            for future in file_request_futures:
-                try:
-                    future.result()
-                except Exception as e:
-                    print(e)
-
-    def read_files(self, pull_number, pull_url):
-        '''Fetch PR files and determine if specified file was changed'''
-        for file in self.fetch_pr_files(pull_number):
+                if pr['files']['pageInfo']['hasNextPage']:
+                    file_request_futures.append(
+                        executor.submit(self.read_files, pull_number, pull_url, pr['updatedAt'])
+                    )
+                else:
+                    self.check_files(pull_url, (file['path'] for file in pr['files']['nodes']))
+
+            self._collect_file_results(file_request_futures)
+
+    def process_pull_requests_rest(self):
+        '''Processes pull requests via the REST API through a bounded
+        producer-consumer pipeline: one thread discovers pull requests while
+        worker threads fetch their files, so list pagination overlaps with
+        file scanning and the backlog of pending PRs stays small'''
+        pr_queue = queue.Queue(maxsize=self.MAX_WORKERS * 2)
+        with ThreadPoolExecutor(max_workers=self.MAX_WORKERS + 1, thread_name_prefix='pr-files') as executor:
+            futures = [executor.submit(self._produce_pull_requests, pr_queue)]
+            futures += [executor.submit(self._scan_files_worker, pr_queue) for _ in range(self.MAX_WORKERS)]
+            self._collect_file_results(futures)
+
+    def _produce_pull_requests(self, pr_queue):
+        '''Feeds pull requests within the date range into the bounded queue,
+        halting discovery at the descending-date cutoff'''
+        try:
+            for pr in self._filter_by_date_range(self.fetch_pull_requests(), 'created_at'):
+                self.pull_requests_searched += 1
+                print(f'Processing PR #{pr["number"]}')
+                pr_queue.put((pr['number'], pr['html_url'], pr['updated_at']))
+        finally:
+            pr_queue.put(None)  # Signal workers that discovery is finished
+
+    def _scan_files_worker(self, pr_queue):
+        '''Takes pull requests off the queue and scans their files until the
+        producer's sentinel arrives'''
+        while True:
+            item = pr_queue.get()
+            if item is None:
+                pr_queue.put(None)  # Pass the sentinel on to the remaining workers
+                return
+            pull_number, pull_url, updated_at = item
+            try:
+                self.read_files(pull_number, pull_url, updated_at)
+            except Exception as e:
+                # Display error message for any pull request we were unable to
+                # fetch files for and continue processing
+                print(e)
+
+    def _collect_file_results(self, file_request_futures):
+        '''Displays error messages for any pull requests we were unable to
+        fetch files for and continues processing'''
+        for future in file_request_futures:
+            try:
+                future.result()
+            except Exception as e:
+                print(e)
+
+    def check_files(self, pull_url, filenames):
+        '''Checks a pull request's changed file paths against the target files.
+        Matches are printed as soon as they are found rather than held back
+        until the whole search completes.'''
+        for filename in filenames:
             self.files_searched += 1
-            if file['filename'] == self.target_file:
-                self.pull_requests_with_file.append(pull_url)
+            if filename in self.target_files:
+                with self._print_lock:
+                    if len(self.target_files) > 1:
+                        print(f'Found match: {pull_url} ({filename})', flush=True)
+                    else:
+                        print(f'Found match: {pull_url}', flush=True)
+                self.pull_requests_with_file.append((pull_url, filename))
                 break # No need to check more files in this pull request
 
+    def _load_cached_pr_files(self, pull_number, updated_at):
+        '''Returns the cached file list for a pull request that has not been
+        updated since it was stored, or None on a miss'''
+        if not updated_at:
+            return None
+        with self._cache_lock:
+            row = self._cache.execute(
+                'SELECT updated_at, files FROM pr_files WHERE owner = ? AND repo = ? AND number = ?',
+                (self.OWNER, self.REPO, pull_number)
+            ).fetchone()
+        if row and row[0] == updated_at:
+            return orjson.loads(row[1])
+        return None
+
+    def _store_pr_files(self, pull_number, updated_at, filenames):
+        '''Stores a pull request's file list keyed by its updated_at timestamp'''
+        if not updated_at:
+            return
+        with self._cache_lock:
+            self._cache.execute(
+                'INSERT OR REPLACE INTO pr_files VALUES (?, ?, ?, ?, ?)',
+                (self.OWNER, self.REPO, pull_number, updated_at, orjson.dumps(filenames).decode())
+            )
+            self._cache.commit()
+
+    def read_files(self, pull_number, pull_url, updated_at=None):
+        '''Fetch PR files via the REST API and determine if a target file was
+        changed. File lists are indexed by (PR, updated_at), so a pull request
+        that has not been updated since a previous search is checked without
+        any network requests.'''
+        filenames = self._load_cached_pr_files(pull_number, updated_at)
+        if filenames is None:
+            filenames = list(self.fetch_pr_files(pull_number))
+            self._store_pr_files(pull_number, updated_at, filenames)
+        self.check_files(pull_url, filenames)
+
     def display_results(self):
+        '''Prints the search summary; matching pull requests were already
+        printed as they were found'''
         if not self.pull_requests_with_file:
-            print(f'\nNo pull requests found that modified {self.target_file}')
+            print(f'\nNo pull requests found that modified {self.targets_display}')
         else:
-            print(f'\nPull requests that modified {self.target_file}:')
-            for pull_url in self.pull_requests_with_file:
-                print(pull_url)
-        print(f'\n\nSearched {analyzer.pull_requests_searched} pull requests and {analyzer.files_searched} files.')
+            print(f'\nFound {len(self.pull_requests_with_file)} pull request(s) that modified {self.targets_display}.')
+        print(f'\n\nSearched {self.pull_requests_searched} pull requests and {self.files_searched} files.')
 
     def run(self):
         '''Main method to run program'''
         try:
+            self.reset_search_results()
             self.read_config()
             self.get_user_inputs()
             self.process_pull_requests()
@@ -222,8 +557,10 @@ class PullRequestAnalyzer:
             sys.exit(1)
 
 if __name__ == '__main__':
+    # One analyzer for the whole session, so repeat searches keep the parsed
+    # config, warm connection pool, and response cache
+    analyzer = PullRequestAnalyzer()
     while True:
-        analyzer = PullRequestAnalyzer()
         analyzer.run()
         end_time = time.time()
         print(f'\nSearch finished in {end_time - analyzer.start_time:.2f} seconds.')